@@ -0,0 +1,53 @@
+"""
+Shared fixtures: import paths, small generated PDFs and an isolated cache.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# pdf_processor imports the utils modules flat (e.g. "from image_utils import ...")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "utils")]
+
+import pdf_processor  # noqa: E402
+
+fitz = pdf_processor._fitz()
+
+
+def striped_pixmap(width, height, shade=0):
+    """Pixmap with a plain background and a diagonal line; compresses well."""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pix.set_rect(pix.irect, (shade, 100, 200))
+    for x in range(0, width, 3):
+        pix.set_pixel(x, x % height, (255, 0, 0))
+    return pix
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Build a one-page PDF from (image_bytes, ...) and return its path."""
+    def build(images=(), text="Hello first paragraph line one.\nline two of paragraph", name="doc.pdf"):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((72, 72), text, fontsize=11)
+        for i, stream in enumerate(images):
+            x = 40 + (i % 4) * 130
+            y = 200 + (i // 4) * 130
+            page.insert_image(fitz.Rect(x, y, x + 120, y + 120), stream=stream)
+        path = tmp_path / name
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+    return build
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Point the extraction cache at a temporary directory and start with an empty memo."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(pdf_processor, "CACHE_DIR", str(cache_dir))
+    pdf_processor._extract_first_page_memo.cache_clear()
+    yield cache_dir
+    pdf_processor._extract_first_page_memo.cache_clear()
@@ -0,0 +1,195 @@
+"""
+Tests for AI batching and the response cache, using a stubbed OpenAI client.
+"""
+
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import ai_processor
+from ai_processor import AIProcessor, LLMCache
+
+DOCUMENT = "Quarterly revenue grew in every region. " * 20
+
+
+class StubCompletions:
+    """
+    Records requests; answers batch requests with JSON (or batch_reply,
+    raised if it is an exception) and single ones with a stream.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.batch_reply = None
+
+    def create(self, stream=False, **request):
+        self.requests.append(request)
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="single"))])])
+        if isinstance(self.batch_reply, Exception):
+            raise self.batch_reply
+        count = request["messages"][1]["content"].count("=== DOC ")
+        reply = self.batch_reply or json.dumps({str(n): f"answer {n}" for n in range(1, count + 1)})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+    def batch_requests(self):
+        return [r for r in self.requests if "=== DOC " in r["messages"][1]["content"]]
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENROUTER_KEY", "test-key")
+    monkeypatch.setenv("OPENROUTER_CACHE", "1")
+    monkeypatch.setenv("OPENROUTER_CACHE_DIR", str(tmp_path / "ai"))
+    processor = AIProcessor()
+    processor.completions = StubCompletions()
+    processor._client = SimpleNamespace(chat=SimpleNamespace(completions=processor.completions))
+    return processor
+
+
+def test_batch_sends_one_request_and_maps_answers(processor):
+    contents = [DOCUMENT + str(n) for n in range(3)]
+
+    results = processor.process_batch(contents)
+
+    assert len(processor.completions.requests) == 1
+    for n, result in enumerate(results, 1):
+        assert f"answer {n}" in result
+        assert result.endswith(contents[n - 1])
+
+
+def test_unparseable_batch_falls_back_to_single_requests(processor):
+    processor.completions.batch_reply = "not json"
+
+    results = processor.process_batch([DOCUMENT + "a", DOCUMENT + "b"])
+
+    assert len(processor.completions.requests) == 3
+    assert all("single" in result for result in results)
+
+
+def test_batch_gives_each_document_its_own_answer_budget(processor):
+    processor.process_batch([DOCUMENT + "a", DOCUMENT + "b", DOCUMENT + "c"])
+
+    request, = processor.completions.requests
+    assert request["max_tokens"] == 3 * processor.max_tokens
+
+
+@pytest.mark.parametrize("reply", [
+    '```json\n{"1": "first", "2": "second"}\n```',
+    '```\n{"1": "first", "2": "second"}\n```',
+    '  {"1": "first", "2": "second"}  ',
+])
+def test_batch_parses_plain_and_fenced_json(processor, reply):
+    processor.completions.batch_reply = reply
+
+    results = processor.process_batch([DOCUMENT + "a", DOCUMENT + "b"])
+
+    assert len(processor.completions.requests) == 1
+    assert "first" in results[0] and "second" in results[1]
+
+
+@pytest.mark.parametrize("error", [
+    openai.APIConnectionError(request=httpx.Request("POST", "https://openrouter.ai/api/v1")),
+    TimeoutError("batch timed out"),
+])
+def test_failed_batch_request_falls_back_per_document(processor, error):
+    processor.completions.batch_reply = error
+
+    results = processor.process_batch([DOCUMENT + "a", DOCUMENT + "b"])
+
+    assert all("single" in result for result in results)
+
+
+def test_batch_skips_trivial_and_cached_documents(processor):
+    cached = DOCUMENT + "cached"
+    processor.process_batch([cached, DOCUMENT + "other"])
+    processor.completions.requests.clear()
+
+    results = processor.process_batch(["tiny", cached, DOCUMENT + "a", DOCUMENT + "b"])
+
+    assert results[0] == "tiny"
+    assert "answer 1" in results[1]
+    assert len(processor.completions.requests) == 1
+    assert processor.completions.requests[0]["messages"][1]["content"].count("=== DOC ") == 2
+
+
+def test_batch_answers_are_not_reused_for_single_documents(processor):
+    processor.process_batch([DOCUMENT + "a", DOCUMENT + "b"])
+
+    result = processor.process_content(DOCUMENT + "a")
+
+    assert "single" in result
+    assert len(processor.completions.requests) == 2
+
+
+def test_batches_fit_input_limit_without_truncation(processor):
+    processor.max_input_tokens = 300
+    contents = [DOCUMENT[:360] + str(n) for n in range(5)]
+
+    processor.process_batch(contents, use_cache=False)
+
+    batch_requests = processor.completions.batch_requests()
+    assert batch_requests
+    sent = sum(r["messages"][1]["content"].count("=== DOC ") for r in batch_requests)
+    singles = len(processor.completions.requests) - len(batch_requests)
+    assert sent + singles == len(contents)
+    for request in batch_requests:
+        user_content = request["messages"][1]["content"]
+        assert ai_processor._truncate(user_content, processor.max_input_tokens) == user_content
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_KEY", "test-key")
+    monkeypatch.delenv("OPENROUTER_CACHE", raising=False)
+
+    assert AIProcessor().cache is None
+
+
+def test_cached_response_is_reused_unless_bypassed(processor):
+    first = processor.process_content(DOCUMENT)
+    second = processor.process_content(DOCUMENT)
+    processor.process_content(DOCUMENT, use_cache=False)
+
+    assert second == first
+    assert len(processor.completions.requests) == 2
+
+
+def test_cache_entries_expire(tmp_path):
+    LLMCache(str(tmp_path), ttl=60).set("key", "value")
+    assert LLMCache(str(tmp_path), ttl=60).get("key") == "value"
+
+    stale = time.time() - 120
+    os.utime(tmp_path / "key.txt", (stale, stale))
+
+    assert LLMCache(str(tmp_path), ttl=60).get("key") is None
+    assert not (tmp_path / "key.txt").exists()
+
+
+def test_create_ai_processor_retries_after_missing_key(monkeypatch):
+    monkeypatch.setattr(ai_processor, "_processor", None)
+    monkeypatch.delenv("OPENROUTER_KEY", raising=False)
+    assert ai_processor.create_ai_processor() is None
+
+    monkeypatch.setenv("OPENROUTER_KEY", "test-key")
+    processor = ai_processor.create_ai_processor()
+
+    assert processor is not None
+    assert ai_processor.create_ai_processor() is processor
+
+
+def test_cache_store_prunes_expired_and_oldest_files(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl=60, max_entries=2)
+    now = time.time()
+    for name, age in [("expired", 120), ("old", 30), ("newer", 10)]:
+        entry = tmp_path / f"{name}.txt"
+        entry.write_text(name)
+        os.utime(entry, (now - age, now - age))
+
+    cache.set("new", "value")
+
+    assert sorted(os.listdir(tmp_path)) == ["new.txt", "newer.txt"]
@@ -0,0 +1,53 @@
+"""
+Tests for the command line entry point's output streams and logging.
+"""
+
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+SCRIPT = """
+import logging
+import sys
+sys.path[:0] = [{root!r}, {utils!r}]
+import pdf_processor
+sys.argv = ["pdf_processor.py"] + {args!r}
+pdf_processor.main()
+logging.getLogger("httpx").debug("library debug line")
+logging.getLogger("convert_pdf_zap").debug("package debug line")
+"""
+
+
+def run_cli(*args):
+    # --no-cache keeps the subprocess away from the real extraction cache
+    code = SCRIPT.format(root=ROOT, utils=os.path.join(ROOT, "utils"), args=[*args, "--no-cache"])
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+
+def test_verbose_output_keeps_stdout_for_content(make_pdf):
+    proc = run_cli(make_pdf(), "--verbose")
+
+    assert proc.stdout.startswith("# PDF Extraction: doc.pdf")
+    assert "Processing:" not in proc.stdout
+    assert "Processing:" in proc.stderr
+
+
+def test_verbose_enables_debug_only_for_the_package(make_pdf):
+    proc = run_cli(make_pdf(), "--verbose")
+
+    assert "package debug line" in proc.stderr
+    assert "library debug line" not in proc.stderr
+
+
+def test_debug_output_is_off_by_default(make_pdf):
+    proc = run_cli(make_pdf())
+
+    assert proc.stderr == ""
+
+
+def test_log_lines_carry_their_level(make_pdf):
+    proc = run_cli(make_pdf(), "--verbose")
+
+    assert "DEBUG: package debug line\n" in proc.stderr
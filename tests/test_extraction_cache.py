@@ -0,0 +1,66 @@
+"""
+Tests for the on-disk extraction cache.
+"""
+
+import os
+import time
+
+import pdf_processor
+from conftest import striped_pixmap
+
+
+def _count_document_opens(monkeypatch):
+    opens = []
+    fitz = pdf_processor._fitz()
+    real_open = fitz.open
+
+    def spy_open(*args, **kwargs):
+        opens.append(args)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(fitz, "open", spy_open)
+    return opens
+
+
+def test_disk_cache_hit_skips_parsing(make_pdf, monkeypatch):
+    path = make_pdf([striped_pixmap(400, 300).tobytes("jpeg")])
+    first = pdf_processor.extract_first_page(path)
+
+    pdf_processor._extract_first_page_memo.cache_clear()
+    opens = _count_document_opens(monkeypatch)
+    second = pdf_processor.extract_first_page(path)
+
+    assert opens == []
+    assert second == first
+
+
+def test_unreadable_cache_entry_is_a_miss(make_pdf):
+    path = make_pdf()
+    expected = pdf_processor.extract_first_page(path, use_cache=False)
+
+    with open(path, "rb") as f:
+        digest = pdf_processor._pdf_digest(f.read())
+    cache_path = pdf_processor._cache_path(digest, True)
+    os.makedirs(pdf_processor.CACHE_DIR, exist_ok=True)
+    # Truncated pickle data: loading it fails partway through the stream
+    with open(cache_path, "wb") as f:
+        f.write(b"\x80\x04\x95\x05\x00\x00\x00\x00\x00\x00\x00]\x94(K")
+
+    assert pdf_processor.extract_first_page(path) == expected
+
+
+def test_prune_removes_old_and_oversized_entries(isolated_cache, monkeypatch):
+    os.makedirs(isolated_cache)
+    now = time.time()
+    for name, age in [("new", 0), ("older", 10), ("oldest", 20)]:
+        entry = isolated_cache / f"{name}.pkl"
+        entry.write_bytes(b"x" * 100)
+        os.utime(entry, (now - age, now - age))
+    expired = isolated_cache / "expired.pkl"
+    expired.write_bytes(b"x")
+    os.utime(expired, (1, 1))
+
+    monkeypatch.setattr(pdf_processor, "CACHE_MAX_BYTES", 250)
+    pdf_processor._prune_cache()
+
+    assert sorted(os.listdir(isolated_cache)) == ["new.pkl", "older.pkl"]
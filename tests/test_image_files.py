@@ -0,0 +1,48 @@
+"""
+Tests for writing images to sidecar files (--image-files).
+"""
+
+import os
+
+import pdf_processor
+from conftest import striped_pixmap
+
+
+def test_image_files_are_written_and_linked(make_pdf, tmp_path):
+    path = make_pdf([striped_pixmap(800, 600, shade=i * 40).tobytes("jpeg") for i in range(2)])
+    out_dir = tmp_path / "out"
+
+    result = pdf_processor.extract_first_page(path, use_cache=False, embed_images=False, image_dir=str(out_dir))
+
+    assert len(result["images"]) == 2
+    for image in result["images"]:
+        assert "data" not in image and "bytes" not in image
+        file_path = out_dir / image["path"]
+        assert file_path.read_bytes()[:2] == b"\xff\xd8"  # JPEG SOI marker
+        assert file_path.stat().st_size == image["size_bytes"]
+
+    markdown = pdf_processor.format_for_ai(result)
+    assert f"](./{result['images'][0]['path']})" in markdown
+    assert "base64" not in markdown
+
+
+def test_image_files_are_rewritten_on_cache_hit(make_pdf, tmp_path):
+    path = make_pdf([striped_pixmap(800, 600).tobytes("jpeg")])
+    out_dir = tmp_path / "out"
+    first = pdf_processor.extract_first_page(path, embed_images=False, image_dir=str(out_dir))
+    file_path = out_dir / first["images"][0]["path"]
+    os.remove(file_path)
+
+    second = pdf_processor.extract_first_page(path, embed_images=False, image_dir=str(out_dir))
+
+    assert second == first
+    assert file_path.exists()
+
+
+def test_image_files_and_embedded_results_are_cached_separately(make_pdf, tmp_path):
+    path = make_pdf([striped_pixmap(800, 600).tobytes("jpeg")])
+
+    pdf_processor.extract_first_page(path, embed_images=False, image_dir=str(tmp_path / "out"))
+    embedded = pdf_processor.extract_first_page(path)
+
+    assert "data" in embedded["images"][0]
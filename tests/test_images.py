@@ -0,0 +1,128 @@
+"""
+Tests for image compression and pass-through of images that already fit.
+"""
+
+import random
+
+import pytest
+
+import pdf_processor
+from conftest import fitz, striped_pixmap
+
+
+def noisy_pixmap(width, height, seed=0):
+    """RGB pixmap of random pixels, so even small images stay above MIN_IMAGE_BYTES."""
+    rng = random.Random(seed)
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    for y in range(height):
+        for x in range(width):
+            pix.set_pixel(x, y, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return pix
+
+
+@pytest.fixture
+def compressor_calls(monkeypatch):
+    """Record calls to the image compressor while still compressing."""
+    calls = []
+    real = pdf_processor.compress_image_with_fitz
+
+    def spy(img_bytes, **kwargs):
+        calls.append(img_bytes)
+        return real(img_bytes, **kwargs)
+
+    monkeypatch.setattr(pdf_processor, "compress_image_with_fitz", spy)
+    return calls
+
+
+def _only_image(path):
+    image, = pdf_processor.extract_first_page(path, use_cache=False)["images"]
+    return image
+
+
+def test_large_image_is_compressed(make_pdf, compressor_calls):
+    original = striped_pixmap(800, 600).tobytes("png")
+
+    image = _only_image(make_pdf([original]))
+
+    assert len(compressor_calls) == 1
+    assert image["passthrough"] is False
+    assert image["format"] == "jpeg"
+    assert image["original_format"] == "png"
+    assert image["size_bytes"] < image["original_size_bytes"]
+    assert image["base64_length"] == len(image["data"])
+
+
+@pytest.mark.parametrize("ext", ["jpeg", "png"])
+def test_small_image_is_embedded_without_compressing(make_pdf, compressor_calls, ext):
+    original = noisy_pixmap(140, 100).tobytes(ext)
+
+    image = _only_image(make_pdf([original]))
+
+    assert compressor_calls == []
+    assert image["passthrough"] is True
+    assert image["format"] == ext
+    assert image["original_format"] == ext
+    assert image["size_bytes"] == image["original_size_bytes"]
+
+
+def test_image_wider_than_the_box_is_compressed(make_pdf, compressor_calls):
+    image = _only_image(make_pdf([striped_pixmap(151, 100).tobytes("jpeg")]))
+
+    assert len(compressor_calls) == 1
+    assert image["passthrough"] is False
+
+
+def test_small_cmyk_jpeg_is_converted(make_pdf, compressor_calls):
+    original = fitz.Pixmap(fitz.csCMYK, striped_pixmap(120, 120)).tobytes("jpeg")
+
+    image = _only_image(make_pdf([original]))
+
+    assert len(compressor_calls) == 1
+    assert image["passthrough"] is False
+    decoded = fitz.Pixmap(pdf_processor.binascii.a2b_base64(image["data"]))
+    assert decoded.colorspace.n == 3
+
+
+@pytest.mark.parametrize("colorspace", ["gray", "rgb"])
+def test_jpeg_fitting_the_box_never_reaches_the_compressor(make_pdf, monkeypatch, colorspace):
+    def fail(*args, **kwargs):
+        raise AssertionError("compressor called for an image that already fits")
+
+    monkeypatch.setattr(pdf_processor, "compress_image_with_fitz", fail)
+    pix = noisy_pixmap(*pdf_processor.MAX_IMAGE_SIZE)
+    if colorspace == "gray":
+        pix = fitz.Pixmap(fitz.csGRAY, pix)
+    original = pix.tobytes("jpeg")
+
+    image = _only_image(make_pdf([original]))
+
+    assert image["passthrough"] is True
+    assert image["data"] == pdf_processor._b64_ascii(original)
+
+
+def test_corrupt_image_is_skipped_and_others_survive(make_pdf, monkeypatch):
+    path = make_pdf([striped_pixmap(400, 300, shade=i * 40).tobytes("jpeg") for i in range(3)])
+    bad_xref = fitz.open(path)[0].get_images()[1][0]
+    real = fitz.Document.extract_image
+
+    def extract_image(doc, xref):
+        if xref == bad_xref:
+            # What MuPDF raises for a corrupt stream; not a RuntimeError
+            raise fitz.mupdf.FzErrorFormat("simulated corrupt image")
+        return real(doc, xref)
+
+    monkeypatch.setattr(fitz.Document, "extract_image", extract_image)
+
+    result = pdf_processor.extract_first_page(path, use_cache=False)
+
+    assert [img["index"] for img in result["images"]] == [1, 3]
+
+
+def test_tiny_images_are_skipped_without_renumbering(make_pdf):
+    tiny = striped_pixmap(8, 8).tobytes("png")
+    large = striped_pixmap(600, 400).tobytes("png")
+
+    result = pdf_processor.extract_first_page(make_pdf([tiny, large]), use_cache=False)
+
+    assert [img["index"] for img in result["images"]] == [2]
+    assert result["image_count"] == 1
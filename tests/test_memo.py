@@ -0,0 +1,57 @@
+"""
+Tests for the in-memory extraction memo keyed by path, mtime and size.
+"""
+
+import os
+
+import pdf_processor
+from conftest import striped_pixmap
+
+
+def _count_extractions(monkeypatch):
+    calls = []
+    real = pdf_processor._extract_first_page
+
+    def spy(*args, **kwargs):
+        calls.append(args)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_processor, "_extract_first_page", spy)
+    return calls
+
+
+def test_memo_reuses_result_until_file_changes(make_pdf, monkeypatch):
+    path = make_pdf()
+    calls = _count_extractions(monkeypatch)
+
+    pdf_processor.extract_first_page(path)
+    pdf_processor.extract_first_page(path)
+    assert len(calls) == 1
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    pdf_processor.extract_first_page(path)
+    assert len(calls) == 2
+
+
+def test_memo_is_bypassed_without_cache(make_pdf, monkeypatch):
+    path = make_pdf()
+    calls = _count_extractions(monkeypatch)
+
+    pdf_processor.extract_first_page(path, use_cache=False)
+    pdf_processor.extract_first_page(path, use_cache=False)
+
+    assert len(calls) == 2
+
+
+def test_memo_hits_are_independent_copies(make_pdf):
+    path = make_pdf([striped_pixmap(400, 300).tobytes("jpeg")])
+    first = pdf_processor.extract_first_page(path)
+    first["images"][0]["format"] = "changed"
+    first["images"].clear()
+    first["text"] = "changed"
+
+    second = pdf_processor.extract_first_page(path)
+
+    assert second["text"] != "changed"
+    assert second["images"][0]["format"] == "jpeg"
@@ -2,10 +2,30 @@
 Utility modules for PDF conversion.
 """
 
+import importlib
+
 from .timeout import run_with_timeout, timeout_handler
 from .file_handler import validate_pdf_file, get_file_info
 from .cli_handler import CLIHandler, create_cli_handler
-from .image_utils import compress_image_with_fitz, get_compression_stats, format_image_info
-from .ai_processor import AIProcessor, create_ai_processor
+
+# Modules that pull in PyMuPDF or openai are imported on first attribute access
+_LAZY_EXPORTS = {
+    'compress_image_with_fitz': '.image_utils',
+    'get_compression_stats': '.image_utils',
+    'format_image_info': '.image_utils',
+    'AIProcessor': '.ai_processor',
+    'create_ai_processor': '.ai_processor',
+}
+
+
+def __getattr__(name):
+    """Load heavy submodules only when one of their exports is used."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = ['run_with_timeout', 'timeout_handler', 'validate_pdf_file', 'get_file_info', 'CLIHandler', 'create_cli_handler', 'compress_image_with_fitz', 'get_compression_stats', 'format_image_info', 'AIProcessor', 'create_ai_processor']
@@ -5,6 +5,214 @@ Handles OpenRouter API integration for PDF content analysis.
 """
 
 import os
+import ssl
+import logging
+import json
+import asyncio
+import hashlib
+import tempfile
+import time
+import weakref
+from functools import lru_cache
+
+try:
+    import certifi  # httpx dependency; its CA bundle is what httpx and openai verify against
+    import httpx
+    from openai import OpenAI, AsyncOpenAI, APIError
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger("convert_pdf_zap")
+
+
+# Static instructions go first and stay byte-identical so provider prompt caches can reuse them
+SYSTEM_PROMPT = "Analyze this PDF content and provide insights:"
+
+# Content below this many estimated tokens (~4 chars each) is not worth an API call
+MIN_CONTENT_TOKENS = 50
+
+# Instructions for answering several documents in one request
+BATCH_PROMPT = (
+    "You will receive several documents, each introduced by a line of the form "
+    "'=== DOC n ==='. Handle every document separately using these instructions:\n\n"
+    "{instructions}\n\n"
+    "Respond only with a JSON object mapping each document number (as a string) "
+    "to its result, e.g. {{\"1\": \"...\", \"2\": \"...\"}}."
+)
+
+# Responses kept on disk; the oldest are deleted past this count
+CACHE_MAX_ENTRIES = 1000
+
+# Header that enables prompt caching when OpenRouter routes to Anthropic models
+ANTHROPIC_CACHE_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+
+@lru_cache(maxsize=None)
+def _shared_ssl_context():
+    """
+    Build the SSL context once; creating it loads the CA bundle from disk.
+    
+    Uses certifi's bundle, as httpx does by default, so hosts without a
+    system CA store still verify.
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def _new_client(api_key, base_url, max_retries=3):
+    """
+    Build an OpenAI client with its own pooled httpx.Client.
+    
+    Each AIProcessor owns the client it creates (and closes it), so repeated
+    calls on one processor reuse the SSL context and connection pool while
+    closing one processor never affects another.
+    The SDK itself retries 429, 5xx and connection errors with exponential
+    backoff (2 times by default); max_retries only changes that count.
+    Other 4xx errors are raised immediately.
+    """
+    http_client = httpx.Client(
+        verify=_shared_ssl_context(),
+        limits=httpx.Limits(
+            max_keepalive_connections=100,
+            max_connections=100,
+            keepalive_expiry=30.0  # Keep sockets alive across main/backup/retry calls
+        )
+    )
+    return OpenAI(base_url=base_url, api_key=api_key, http_client=http_client, max_retries=max_retries)
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """Load the tokenizer once; building the BPE tables is slow on first use."""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _truncate(content, max_tokens):
+    """
+    Trim content to at most max_tokens tokens.
+    
+    Slices on token boundaries with tiktoken when it is installed, otherwise
+    falls back to ~4 characters per token.
+    """
+    # A token is at least one UTF-8 byte and a character at most four
+    if len(content) * 4 <= max_tokens:
+        return content
+    
+    if TIKTOKEN_AVAILABLE:
+        encoding = _encoder()
+        tokens = encoding.encode(content, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return content
+        return encoding.decode(tokens[:max_tokens])
+    
+    return content[:max_tokens * 4]
+
+
+def _count_tokens(text):
+    """Count tokens the way _truncate measures them (tiktoken, else ~4 characters per token)."""
+    if TIKTOKEN_AVAILABLE:
+        return len(_encoder().encode(text, disallowed_special=()))
+    return -(-len(text) // 4)
+
+
+class LLMCache:
+    """
+    Exact-match cache for AI responses, kept in memory and optionally on disk.
+    
+    Responses come from sampling, so entries expire after ttl seconds
+    (None keeps them forever). Expired files are removed on lookup and on
+    every store, which also deletes the oldest files past max_entries.
+    """
+    
+    def __init__(self, cache_dir=None, ttl=None, max_entries=CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = {}
+    
+    @staticmethod
+    def make_key(model, prompt, max_tokens):
+        """Build a cache key from everything that determines the response."""
+        raw = f"{model}\0{max_tokens}\0{prompt}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+    
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+    
+    def get(self, key):
+        """Return the cached response for key, or None on a miss or expired entry."""
+        if key in self._memory:
+            value, stored_at = self._memory[key]
+            if not self._expired(stored_at):
+                return value
+            del self._memory[key]
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                stored_at = os.path.getmtime(path)
+                if self._expired(stored_at):
+                    os.remove(path)
+                    return None
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = f.read()
+            except OSError:
+                return None
+            self._memory[key] = (value, stored_at)
+            return value
+        return None
+    
+    def set(self, key, value):
+        """Store a response; disk write failures only lose the persistent copy."""
+        self._memory[key] = (value, time.time())
+        if self.cache_dir:
+            tmp_path = None
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # A unique temporary file per write, so concurrent runs never share one
+                with tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', dir=self.cache_dir, suffix='.tmp', delete=False
+                ) as f:
+                    tmp_path = f.name
+                    f.write(value)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                if tmp_path is not None:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+                return
+            self._prune()
+    
+    def _prune(self):
+        """Delete expired disk entries, then the oldest past max_entries."""
+        try:
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.txt'):
+                        entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            return
+        
+        entries.sort()
+        excess = len(entries) - self.max_entries
+        for i, (stored_at, path) in enumerate(entries):
+            if i >= excess and not self._expired(stored_at):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
 
 class AIProcessor:
@@ -17,11 +225,82 @@ class AIProcessor:
         self.backup_model = os.getenv("OPENROUTER_BACKUP_MODEL", "google/gemma-2-9b-it:free")
         self.timeout = int(os.getenv("OPENROUTER_TIMEOUT", "30000")) / 1000  # Convert to seconds
         self.max_tokens = int(os.getenv("OPENROUTER_MAX_TOKENS", "1000"))
+        self.max_input_tokens = int(os.getenv("OPENROUTER_MAX_INPUT_TOKENS", "32000"))
+        # Passed to the SDK's built-in retry (its default is 2); configurable, one more by default
+        self.max_retries = int(os.getenv("OPENROUTER_MAX_RETRIES", "3"))
+        self.batch_token_budget = int(os.getenv("OPENROUTER_BATCH_TOKENS", "24000"))
+        self.fallback_backoff = float(os.getenv("OPENROUTER_FALLBACK_BACKOFF", "1.0"))
         self.base_url = "https://openrouter.ai/api/v1"
+        self._client = None
+        # One async client per event loop: async connections are bound to the loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+        
+        # Response cache, opt-in since answers are sampled (OPENROUTER_CACHE=1 to enable)
+        self.cache = None
+        if os.getenv("OPENROUTER_CACHE", "0") == "1":
+            cache_dir = os.getenv(
+                "OPENROUTER_CACHE_DIR",
+                os.path.expanduser("~/.cache/convert-pdf-zap/ai")
+            )
+            ttl = float(os.getenv("OPENROUTER_CACHE_TTL", "86400"))  # Seconds; 0 = never expire
+            self.cache = LLMCache(cache_dir, ttl=ttl or None)
+        self.stats = {"hits": 0, "misses": 0}
         
         # Validate configuration
         self._validate_config()
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the pooled HTTP connections owned by this processor."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+    
+    async def aclose(self):
+        """Close the pooled async HTTP connections this processor opened on the running loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    def _get_openai_client(self):
+        """Return this processor's pooled OpenRouter client, creating it on first use."""
+        if self._client is None:
+            self._client = _new_client(self.api_key, self.base_url, self.max_retries)
+        return self._client
+    
+    def _get_async_openai_client(self):
+        """
+        Return the pooled async OpenRouter client for the running event loop.
+        
+        Async connections are bound to the loop that opened them, so each
+        loop (e.g. each asyncio.run() call) gets its own client; entries for
+        finished loops are dropped with the loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            http_client = httpx.AsyncClient(
+                verify=_shared_ssl_context(),
+                limits=httpx.Limits(
+                    max_keepalive_connections=100,
+                    max_connections=100,
+                    keepalive_expiry=30.0
+                )
+            )
+            client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                http_client=http_client,
+                max_retries=self.max_retries
+            )
+            self._async_clients[loop] = client
+        return client
+    
     def _validate_config(self):
         """Validate that required configuration is present."""
         if not self.api_key:
@@ -31,7 +310,67 @@ class AIProcessor:
         """Check if AI processing is available."""
         return bool(self.api_key)
     
-    def process_content(self, content, use_backup=False, custom_prompt=None):
+    @staticmethod
+    def is_trivial(content):
+        """Check if content is too short for AI analysis to add anything."""
+        return not content.strip() or len(content) // 4 < MIN_CONTENT_TOKENS
+    
+    def _build_messages(self, content, custom_prompt=None):
+        """
+        Build chat messages: static instructions first (cacheable prefix),
+        PDF content last, truncated to max_input_tokens.
+        """
+        instructions = custom_prompt or SYSTEM_PROMPT
+        return [
+            {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": instructions,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            },
+            {
+                "role": "user",
+                "content": _truncate(content, self.max_input_tokens)
+            }
+        ]
+    
+    def _request_kwargs(self, model, messages):
+        """Keyword arguments shared by sync and async chat completion calls."""
+        return {
+            "model": model,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "timeout": self.timeout,
+            "extra_headers": ANTHROPIC_CACHE_HEADERS if model.startswith("anthropic/") else None
+        }
+    
+    def _cache_lookup(self, model, messages, use_cache=True):
+        """Return (cache_key, cached_response); both are None when caching is off or bypassed."""
+        if self.cache is None or not use_cache:
+            return None, None
+        instructions = messages[0]["content"][0]["text"]
+        content = messages[1]["content"]
+        cache_key = LLMCache.make_key(model, f"{instructions}\0{content}", self.max_tokens)
+        ai_response = self.cache.get(cache_key)
+        if ai_response is not None:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+        return cache_key, ai_response
+    
+    def _cache_store(self, cache_key, ai_response):
+        """Store a fresh response when caching is enabled."""
+        if cache_key is not None and ai_response:
+            self.cache.set(cache_key, ai_response)
+    
+    @staticmethod
+    def _format_result(model, ai_response, content):
+        """Prepend the AI analysis to the original content."""
+        return f"# AI Analysis ({model})\n\n{ai_response}\n\n---\n\n{content}"
+    
+    def process_content(self, content, use_backup=False, custom_prompt=None, use_cache=True):
         """
         Process content with OpenRouter AI.
         
@@ -39,6 +378,7 @@ class AIProcessor:
             content: Content to process (markdown or json)
             use_backup: Whether to use backup model instead of main model
             custom_prompt: Optional custom prompt to use
+            use_cache: Whether to consult and update the response cache
             
         Returns:
             str: AI-processed response with original content appended
@@ -47,75 +387,285 @@ class AIProcessor:
             ImportError: If openai library not installed
             Exception: If API call fails
         """
-        try:
-            # Import OpenAI client for OpenRouter
-            from openai import OpenAI
-        except ImportError:
+        return "".join(self.process_content_stream(content, use_backup, custom_prompt, use_cache))
+    
+    def process_content_stream(self, content, use_backup=False, custom_prompt=None, use_cache=True):
+        """
+        Stream the output of process_content piece by piece.
+        
+        The response is requested with stream=True so tokens can be consumed
+        (e.g. written to disk) while the rest are still arriving. Joining the
+        yielded pieces gives exactly the process_content result.
+        
+        Yields:
+            str: Successive fragments of the AI-processed output
+            
+        Raises:
+            ImportError: If openai library not installed
+            Exception: If API call fails
+        """
+        if not OPENAI_AVAILABLE:
             raise ImportError("openai library not installed. Run: pip install openai>=1.0.0")
         
         # Select model
         model = self.backup_model if use_backup else self.main_model
+        messages = self._build_messages(content, custom_prompt)
         
-        # Initialize OpenRouter client
-        client = OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-        )
+        # Return a cached response for an identical request
+        cache_key, ai_response = self._cache_lookup(model, messages, use_cache)
         
-        # Prepare the prompt
-        if custom_prompt:
-            prompt = f"{custom_prompt}\n\n{content}"
-        else:
-            prompt = f"Analyze this PDF content and provide insights:\n\n{content}"
+        if ai_response is not None:
+            yield self._format_result(model, ai_response, content)
+            return
         
-        # Make API call to OpenRouter
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }],
-            max_tokens=self.max_tokens,
-            timeout=self.timeout
+        # Make API call to OpenRouter over the pooled client
+        client = self._get_openai_client()
+        response = client.chat.completions.create(stream=True, **self._request_kwargs(model, messages))
+        
+        yield f"# AI Analysis ({model})\n\n"
+        parts = []
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+        yield f"\n\n---\n\n{content}"
+        
+        self._cache_store(cache_key, "".join(parts))
+    
+    async def aprocess_content(self, content, use_backup=False, custom_prompt=None, use_cache=True):
+        """
+        Async variant of process_content.
+        
+        Lets batch pipelines run several analyses concurrently, e.g.
+        ``await asyncio.gather(*[p.aprocess_with_fallback(c) for c in contents])``.
+        """
+        if not OPENAI_AVAILABLE:
+            raise ImportError("openai library not installed. Run: pip install openai>=1.0.0")
+        
+        model = self.backup_model if use_backup else self.main_model
+        messages = self._build_messages(content, custom_prompt)
+        
+        cache_key, ai_response = self._cache_lookup(model, messages, use_cache)
+        
+        if ai_response is None:
+            client = self._get_async_openai_client()
+            response = await client.chat.completions.create(**self._request_kwargs(model, messages))
+            
+            ai_response = response.choices[0].message.content
+            self._cache_store(cache_key, ai_response)
+        
+        return self._format_result(model, ai_response, content)
+    
+    def _split_batches(self, contents):
+        """
+        Group contents into batches whose combined request is never truncated.
+        
+        Each batch fits both batch_token_budget and max_input_tokens, counting
+        the per-document headers. A document too large for that on its own
+        forms a single-document batch, which is processed individually.
+        """
+        budget = min(self.batch_token_budget, self.max_input_tokens)
+        # Room for the "=== DOC n ===" header and blank-line separator of each document
+        header_tokens = _count_tokens("=== DOC 9999 ===\n\n\n") + 1
+        batches = []
+        current = []
+        current_tokens = 0
+        for index, content in enumerate(contents):
+            tokens = _count_tokens(content) + header_tokens
+            if current and current_tokens + tokens > budget:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    @staticmethod
+    def _batch_instructions(custom_prompt=None):
+        """System instructions for a batch request."""
+        return BATCH_PROMPT.format(instructions=custom_prompt or SYSTEM_PROMPT)
+    
+    def _process_batch_request(self, contents, model, custom_prompt=None):
+        """Send several documents in one request and return the per-document analyses."""
+        instructions = self._batch_instructions(custom_prompt)
+        sections = "\n\n".join(
+            f"=== DOC {number} ===\n{content}"
+            for number, content in enumerate(contents, 1)
         )
+        messages = self._build_messages(sections, instructions)
         
-        # Extract and return the response
-        ai_response = response.choices[0].message.content
-        return f"# AI Analysis ({model})\n\n{ai_response}\n\n---\n\n{content}"
+        request = self._request_kwargs(model, messages)
+        # Budget per document on the output side: each answer gets the usual max_tokens.
+        # Inputs need no per-document share, since _split_batches only groups whole documents that fit.
+        request["max_tokens"] = self.max_tokens * len(contents)
+        response = self._get_openai_client().chat.completions.create(**request)
+        
+        # Models often wrap JSON in a markdown code fence
+        raw = response.choices[0].message.content.strip()
+        if raw.startswith("```"):
+            raw = raw.strip("`")
+            raw = raw[raw.find("{"):]
+        parsed = json.loads(raw)
+        return [str(parsed[str(number)]) for number in range(1, len(contents) + 1)]
     
-    def process_with_fallback(self, content, custom_prompt=None):
+    def process_batch(self, contents, use_backup=False, custom_prompt=None, use_cache=True):
+        """
+        Process several documents with as few API calls as possible.
+        
+        Trivial documents are returned unchanged and cached answers are reused
+        per document. The rest are grouped into batches that fit the token
+        limits without truncation, and each batch is sent as one request
+        asking for a JSON answer keyed by document number. If a batch request
+        fails or its response cannot be parsed, its documents are processed
+        one by one instead (with the backup model as fallback).
+        
+        Answers from batch requests are cached under the batch instructions,
+        separately from single-document answers, since they were generated
+        with a different prompt.
+        
+        Args:
+            contents: List of contents to process
+            use_backup: Whether to use backup model instead of main model
+            custom_prompt: Optional custom prompt applied to every document
+            use_cache: Whether to consult and update the response cache
+            
+        Returns:
+            list: AI-processed responses in the same order as contents
+            
+        Raises:
+            ImportError: If openai library not installed
+            Exception: If an API call fails
+        """
+        if not OPENAI_AVAILABLE:
+            raise ImportError("openai library not installed. Run: pip install openai>=1.0.0")
+        
+        model = self.backup_model if use_backup else self.main_model
+        results = [None] * len(contents)
+        
+        # Answer trivial and cached documents without a request
+        batch_instructions = self._batch_instructions(custom_prompt)
+        pending = []
+        cache_keys = {}
+        for i, content in enumerate(contents):
+            if self.is_trivial(content):
+                results[i] = content
+                continue
+            cache_key, ai_response = self._cache_lookup(
+                model, self._build_messages(content, batch_instructions), use_cache
+            )
+            if ai_response is not None:
+                results[i] = self._format_result(model, ai_response, content)
+            else:
+                cache_keys[i] = cache_key
+                pending.append(i)
+        
+        pending_contents = [contents[i] for i in pending]
+        for positions in self._split_batches(pending_contents):
+            batch = [pending[p] for p in positions]
+            batch_contents = [contents[i] for i in batch]
+            analyses = None
+            if len(batch) > 1:
+                try:
+                    analyses = self._process_batch_request(batch_contents, model, custom_prompt)
+                except (APIError, TimeoutError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    logger.warning(f"Batch request failed, processing documents individually: {e}")
+            
+            for position, (i, content) in enumerate(zip(batch, batch_contents)):
+                if analyses is not None:
+                    results[i] = self._format_result(model, analyses[position], content)
+                    self._cache_store(cache_keys[i], analyses[position])
+                elif use_backup:
+                    results[i] = self.process_content(
+                        content, use_backup=True, custom_prompt=custom_prompt, use_cache=use_cache
+                    )
+                else:
+                    results[i] = self.process_with_fallback(
+                        content, custom_prompt=custom_prompt, use_cache=use_cache
+                    )
+        
+        return results
+    
+    def process_with_fallback(self, content, custom_prompt=None, use_cache=True):
         """
         Process content with automatic fallback to backup model on failure.
         
+        Transient errors (429, 5xx) are retried on the main model by the
+        SDK's built-in retry (max_retries times) before the backup model
+        is tried.
+        
         Args:
             content: Content to process
             custom_prompt: Optional custom prompt
+            use_cache: Whether to consult and update the response cache
             
         Returns:
             str: AI-processed response or original content if all models fail
         """
         if not self.is_available():
-            print("❌ Error: OPENROUTER_KEY not found in environment variables")
+            logger.error("❌ Error: OPENROUTER_KEY not found in environment variables")
+            return content
+        
+        if self.is_trivial(content):
+            logger.info("⏭️  Skipping AI processing: content too short to analyze")
             return content
         
         try:
             # Try main model first
-            return self.process_content(content, use_backup=False, custom_prompt=custom_prompt)
+            return self.process_content(content, use_backup=False, custom_prompt=custom_prompt, use_cache=use_cache)
             
         except ImportError as e:
-            print(f"❌ Error: {e}")
+            logger.error(f"❌ Error: {e}")
             return content
             
         except Exception as e:
-            print(f"❌ AI processing failed with main model: {e}")
+            logger.warning(f"❌ AI processing failed with main model: {e}")
             
             try:
                 # Try backup model
-                print("🔄 Trying backup model...")
-                return self.process_content(content, use_backup=True, custom_prompt=custom_prompt)
+                logger.info("🔄 Trying backup model...")
+                return self.process_content(content, use_backup=True, custom_prompt=custom_prompt, use_cache=use_cache)
                 
             except Exception as backup_e:
-                print(f"❌ Backup model also failed: {backup_e}")
+                logger.error(f"❌ Backup model also failed: {backup_e}")
+                return content
+    
+    async def aprocess_with_fallback(self, content, custom_prompt=None, use_cache=True):
+        """
+        Async variant of process_with_fallback.
+        
+        Waits fallback_backoff seconds with asyncio.sleep before trying the
+        backup model, so other analyses keep running on the event loop.
+        """
+        if not self.is_available():
+            logger.error("❌ Error: OPENROUTER_KEY not found in environment variables")
+            return content
+        
+        if self.is_trivial(content):
+            logger.info("⏭️  Skipping AI processing: content too short to analyze")
+            return content
+        
+        try:
+            return await self.aprocess_content(content, use_backup=False, custom_prompt=custom_prompt, use_cache=use_cache)
+            
+        except ImportError as e:
+            logger.error(f"❌ Error: {e}")
+            return content
+            
+        except Exception as e:
+            logger.warning(f"❌ AI processing failed with main model: {e}")
+            
+            try:
+                logger.info("🔄 Trying backup model...")
+                await asyncio.sleep(self.fallback_backoff)
+                return await self.aprocess_content(content, use_backup=True, custom_prompt=custom_prompt, use_cache=use_cache)
+                
+            except Exception as backup_e:
+                logger.error(f"❌ Backup model also failed: {backup_e}")
                 return content
     
     def get_model_info(self, use_backup=False):
@@ -126,17 +676,32 @@ class AIProcessor:
             "type": "backup" if use_backup else "main",
             "timeout": self.timeout,
             "max_tokens": self.max_tokens,
+            "max_retries": self.max_retries,
             "available": self.is_available()
         }
 
 
+# Process-wide instance returned by create_ai_processor
+_processor = None
+
+
 def create_ai_processor():
-    """Factory function to create and return an AIProcessor instance."""
-    try:
-        return AIProcessor()
-    except ValueError as e:
-        print(f"Warning: AI processor not available - {e}")
-        return None
+    """
+    Factory function returning the process-wide AIProcessor instance.
+    
+    The instance is memoized so every caller shares one configuration,
+    connection pool and response cache. A failed construction (e.g. no
+    OPENROUTER_KEY yet) is not memoized, so a later call can still succeed
+    once the environment is set.
+    """
+    global _processor
+    if _processor is None:
+        try:
+            _processor = AIProcessor()
+        except ValueError as e:
+            logger.warning(f"AI processor not available - {e}")
+            return None
+    return _processor
 
 
 # Example usage and testing
@@ -28,6 +28,8 @@ Examples:
   python main.py document.pdf --json                 # Extract to JSON
   python main.py document.pdf --no-images            # Text only
   python main.py document.pdf --save                 # Save to file
+  python main.py document.pdf --no-cache             # Ignore cached extraction/AI answers
+  python main.py document.pdf --save --image-files   # Images as files next to output
   python main.py document.pdf --ai openrouter        # Process with AI (main model)
   python main.py document.pdf --ai backup            # Process with AI (backup model)
   python main.py document.pdf --ai openrouter --ai-prompt "Summarize this document"
@@ -46,6 +48,10 @@ Examples:
                            help='Output file path')
         parser.add_argument('--save', action='store_true',
                            help='Save to default filename (pdf_name.md or .json)')
+        parser.add_argument('--no-cache', action='store_true',
+                           help='Re-extract and re-query AI even if this PDF was processed before')
+        parser.add_argument('--image-files', action='store_true',
+                           help='Write images as files next to the output instead of embedding base64 (needs --output or --save)')
         
         # AI options
         parser.add_argument('--ai', choices=['openrouter', 'backup', 'none'], 
@@ -74,44 +80,53 @@ Examples:
     def print_processing_start(self, pdf_file):
         """Print processing start message."""
         if self.verbose:
-            print(f"📄 Processing: {pdf_file}")
+            print(f"📄 Processing: {pdf_file}", file=sys.stderr)
     
     def print_extraction_stats(self, result):
         """Print extraction statistics."""
         if self.verbose:
-            print(f"✅ Extracted {len(result['text'])} characters of text")
-            print(f"✅ Found {result['image_count']} images")
+            print(f"✅ Extracted {len(result['text'])} characters of text", file=sys.stderr)
+            print(f"✅ Found {result['image_count']} images", file=sys.stderr)
+            if result['images']:
+                compressed = sum(1 for img in result['images'] if not img.get('passthrough'))
+                print(f"🖼️  Compressed {compressed}, embedded {len(result['images']) - compressed} as-is", file=sys.stderr)
     
     def print_ai_processing(self, ai_provider):
         """Print AI processing message."""
         if self.verbose:
             model_type = "backup model" if ai_provider == "backup" else "main model"
-            print(f"🤖 Processing with OpenRouter ({model_type})...")
+            print(f"🤖 Processing with OpenRouter ({model_type})...", file=sys.stderr)
     
     def print_save_success(self, output_file, result=None, ai_processed=False):
         """Print successful save message with optional stats."""
-        print(f"✅ Content saved to: {output_file}")
+        print(f"✅ Content saved to: {output_file}", file=sys.stderr)
         if not ai_processed and result:  # Don't show stats if AI processed
-            print(f"📊 Found {result['image_count']} images from first page")
+            print(f"📊 Found {result['image_count']} images from first page", file=sys.stderr)
     
     def print_content(self, content):
         """Print content to console."""
         print(content)
     
+    def print_stream(self, write_content):
+        """Print content produced by write_content(fp) to console without buffering it all."""
+        write_content(sys.stdout)
+        sys.stdout.write("\n")
+    
     def print_error(self, error, show_traceback=None):
         """Print error message with optional traceback."""
-        print(f"❌ Error: {error}")
+        print(f"❌ Error: {error}", file=sys.stderr)
         show_tb = show_traceback if show_traceback is not None else self.verbose
-        if show_tb:
-            traceback.print_exc()
+        # Only format a traceback when one is wanted and an exception is being handled
+        if show_tb and sys.exc_info()[0] is not None:
+            traceback.print_exc(file=sys.stderr)
     
     def print_file_not_found(self, pdf_file):
         """Print file not found error."""
-        print(f"❌ Error: File not found: {pdf_file}")
+        print(f"❌ Error: File not found: {pdf_file}", file=sys.stderr)
     
     def print_warning(self, message):
         """Print warning message."""
-        print(f"Warning: {message}")
+        print(f"Warning: {message}", file=sys.stderr)
     
     def validate_file(self, pdf_file):
         """Validate PDF file exists."""
@@ -131,9 +146,14 @@ Examples:
     
     def save_to_file(self, content, output_file, result=None, ai_processed=False):
         """Save content to file with error handling."""
+        self.save_stream_to_file(lambda f: f.write(content), output_file, result, ai_processed)
+    
+    def save_stream_to_file(self, write_content, output_file, result=None, ai_processed=False):
+        """Save content produced by write_content(fp) to file with error handling."""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 1MB buffer: streamed output arrives as many small writes
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                write_content(f)
             self.print_save_success(output_file, result, ai_processed)
         except Exception as e:
             self.print_error(f"Could not save to file: {e}")
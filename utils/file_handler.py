@@ -7,42 +7,62 @@ import os
 import sys
 from pathlib import Path
 
+# PDF readers accept the %PDF- header anywhere in the first 1KB
+PDF_HEADER_SEARCH_BYTES = 1024
+
 
 def validate_pdf_file(file_path):
     """
     Validate that the provided file is a valid PDF file.
     
+    Checks the %PDF- header bytes rather than parsing the document;
+    deeper validation is left to the extractor, which opens it anyway.
+    Existence and size come from the same open file, with no separate stat.
+    
     Args:
         file_path: Path to the file to validate
         
     Returns:
-        bool: True if valid PDF file
+        int: File size in bytes (always truthy for a valid PDF), which can
+            be passed on to get_file_info
         
     Raises:
         SystemExit: If file doesn't exist or isn't a PDF
     """
-    if not os.path.exists(file_path):
-        print(f"Error: File does not exist: {file_path}")
+    if not file_path.lower().endswith('.pdf'):
+        print(f"Error: File must be a PDF: {file_path}", file=sys.stderr)
         sys.exit(1)
     
-    if not file_path.lower().endswith('.pdf'):
-        print(f"Error: File must be a PDF: {file_path}")
+    try:
+        with open(file_path, 'rb') as f:
+            size_bytes = os.fstat(f.fileno()).st_size
+            header = f.read(PDF_HEADER_SEARCH_BYTES)
+    except FileNotFoundError:
+        print(f"Error: File does not exist: {file_path}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"Error: Could not read file: {file_path} ({e})", file=sys.stderr)
+        sys.exit(1)
+    
+    if b'%PDF-' not in header:
+        print(f"Error: File is not a valid PDF (missing %PDF- header): {file_path}", file=sys.stderr)
         sys.exit(1)
     
-    return True
+    return size_bytes
 
 
-def get_file_info(file_path):
+def get_file_info(file_path, size_bytes=None):
     """
     Get information about a file.
     
     Args:
         file_path: Path to the file
+        size_bytes: Size already known from validate_pdf_file (skips the stat)
         
     Returns:
         dict: File information including size in MB
     """
-    file_size_bytes = os.path.getsize(file_path)
+    file_size_bytes = os.path.getsize(file_path) if size_bytes is None else size_bytes
     file_size_mb = file_size_bytes / (1024 * 1024)
     
     return {
@@ -70,5 +90,5 @@ def validpdf(submitted_file):
     if submitted_file.endswith('pdf'):
         return True
     else:
-        print("not a valid pdf")
+        print("not a valid pdf", file=sys.stderr)
         sys.exit(1)
@@ -4,16 +4,20 @@ Image Utilities
 Handles image compression using PyMuPDF with no additional dependencies.
 """
 
-try:
-    import fitz  # PyMuPDF
-except ImportError:
-    raise ImportError("PyMuPDF not installed. Run: pip install pymupdf")
+import math
+import logging
+
+logger = logging.getLogger("convert_pdf_zap")
 
 
 def compress_image_with_fitz(img_bytes, max_size=(150, 150), quality=70):
     """
     Compress image using PyMuPDF (no additional dependencies).
     
+    The image is decoded directly into a Pixmap (no temporary PDF page),
+    halved with Pixmap.shrink() while still at least twice the target size,
+    then scaled to the exact fit and encoded as JPEG.
+    
     Args:
         img_bytes: Original image bytes
         max_size: Maximum dimensions (width, height)  
@@ -22,39 +26,52 @@ def compress_image_with_fitz(img_bytes, max_size=(150, 150), quality=70):
     Returns:
         bytes: Compressed image bytes
     """
+    # PyMuPDF is imported on first use so importing this module stays cheap
+    try:
+        import pymupdf as fitz  # Avoids the stdout deprecation banner of the "fitz" name
+    except ImportError:
+        try:
+            import fitz  # PyMuPDF < 1.24.3
+        except ImportError:
+            raise ImportError("PyMuPDF not installed. Run: pip install pymupdf")
+    
     try:
-        # Create a temporary document with the image
-        img_doc = fitz.open("png", img_bytes)  # Open image as document
-        page = img_doc[0]
+        # Decode the image straight into a pixmap
+        pix = fitz.Pixmap(img_bytes)
+        original_width, original_height = pix.width, pix.height
         
-        # Get original dimensions
-        rect = page.rect
-        original_width, original_height = rect.width, rect.height
+        # JPEG output needs gray or RGB without alpha
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # Drop alpha channel
+        if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+            pix = fitz.Pixmap(fitz.csRGB, pix)
         
         # Calculate new dimensions maintaining aspect ratio
         ratio = min(max_size[0] / original_width, max_size[1] / original_height)
         if ratio < 1:  # Only resize if image is larger than max_size
-            new_width = int(original_width * ratio)
-            new_height = int(original_height * ratio)
+            new_width = max(1, int(original_width * ratio))
+            new_height = max(1, int(original_height * ratio))
+            
+            # Power-of-two box reduction in place, then a small exact resample
+            shrink_steps = int(math.log2(1 / ratio))
+            if shrink_steps > 0:
+                pix.shrink(shrink_steps)
+            if (pix.width, pix.height) != (new_width, new_height):
+                pix = fitz.Pixmap(pix, new_width, new_height, None)
         else:
-            new_width, new_height = int(original_width), int(original_height)
-        
-        # Create new pixmap with smaller dimensions
-        mat = fitz.Matrix(new_width / original_width, new_height / original_height)
-        pix = page.get_pixmap(matrix=mat, alpha=False)  # No alpha channel
+            new_width, new_height = original_width, original_height
         
         # Convert to JPEG with compression
         compressed_bytes = pix.tobytes("jpeg", jpg_quality=quality)
+        del pix  # Free the pixmap buffer before logging/returning
         
-        img_doc.close()
-        
-        print(f"Debug: Resized from {int(original_width)}x{int(original_height)} to {new_width}x{new_height}")
-        print(f"Debug: Original: {len(img_bytes)} bytes, Compressed: {len(compressed_bytes)} bytes")
+        logger.debug("Resized from %dx%d to %dx%d", original_width, original_height, new_width, new_height)
+        logger.debug("Original: %d bytes, Compressed: %d bytes", len(img_bytes), len(compressed_bytes))
         
         return compressed_bytes
         
     except Exception as e:
-        print(f"Warning: PyMuPDF compression failed: {e}")
+        logger.warning(f"PyMuPDF compression failed: {e}")
         return img_bytes
 
 
@@ -113,7 +130,7 @@ def format_image_info(img_data, index=1):
         "index": index,
         "format": img_data.get('format', 'unknown').upper(),
         "size_bytes": img_data['size_bytes'],
-        "base64_length": len(img_data['data']),
+        "base64_length": img_data.get('base64_length', len(img_data.get('data', ''))),
         **compression_info
     }
 
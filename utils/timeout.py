@@ -3,17 +3,26 @@ Timeout functionality for PDF conversion operations.
 Extracted from main.py to enable reusability and testing.
 """
 
-import signal
 import sys
+import threading
+import warnings
 
 
 def timeout_handler(signum, frame):
     """
     Signal handler for timeout operations.
     Prints error message and exits when timeout occurs.
+    
+    Deprecated: run_with_timeout no longer uses signals and raises
+    TimeoutError instead; kept for callers that install it themselves.
     """
-    print("ERROR: Operation timed out!")
-    print("The conversion appears to be hanging.")
+    warnings.warn(
+        "timeout_handler is deprecated; catch TimeoutError from run_with_timeout instead",
+        DeprecationWarning,
+        stacklevel=2
+    )
+    print("ERROR: Operation timed out!", file=sys.stderr)
+    print("The conversion appears to be hanging.", file=sys.stderr)
     sys.exit(1)
 
 
@@ -21,6 +30,12 @@ def run_with_timeout(func, timeout_seconds=300):
     """
     Run a function with a timeout.
     
+    The function runs in a daemon worker thread, so this works from any
+    thread and on any platform, and concurrent calls each get their own
+    timeout (unlike a process-wide SIGALRM handler). A timed-out worker
+    cannot be interrupted: it keeps running in the background until func
+    returns, but being a daemon it does not keep the process alive on exit.
+    
     Args:
         func: Function to execute
         timeout_seconds: Maximum time to allow (default: 5 minutes)
@@ -30,14 +45,23 @@ def run_with_timeout(func, timeout_seconds=300):
         
     Raises:
         Any exception raised by the function
-        SystemExit: If timeout occurs
+        TimeoutError: If func does not finish within timeout_seconds
     """
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(timeout_seconds)
-    try:
-        result = func()
-        signal.alarm(0)  # Cancel the alarm
-        return result
-    except:
-        signal.alarm(0)  # Cancel the alarm
-        raise
+    outcome = {}
+    
+    def target():
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+    
+    worker = threading.Thread(target=target, name="run_with_timeout", daemon=True)
+    worker.start()
+    worker.join(timeout_seconds)
+    
+    if worker.is_alive():
+        raise TimeoutError(f"Operation timed out after {timeout_seconds} seconds")
+    
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')